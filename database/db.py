@@ -1,11 +1,14 @@
 import sqlite3
 import datetime
 
+# Default number of minutes new openings are held before being emailed as one digest
+DEFAULT_COALESCE_MINUTES = 15
+
 ##################################################################################
 # init_db
 #
-# Initializes the database and creates the required tables (`sent_notifications`
-# and `recipients`) if they don't already exist.
+# Initializes the database and creates the required tables (`sent_notifications`,
+# `recipients` and `pending_notifications`) if they don't already exist.
 #
 # Inputs:
 #   None
@@ -25,15 +28,54 @@ def init_db():
             class_time TEXT, 
             class_level TEXT, 
             recipient_email TEXT, 
-            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            class_location TEXT
         )
     """)
 
+    # Add the class_location column to sent_notifications tables created before
+    # it existed. Older rows keep a NULL location, which matches any location.
+    cursor.execute("PRAGMA table_info(sent_notifications)")
+    if "class_location" not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE sent_notifications ADD COLUMN class_location TEXT")
+
     # Create the recipients table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS recipients (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE
+            email TEXT UNIQUE,
+            coalesce_minutes INTEGER DEFAULT %d
+        )
+    """ % DEFAULT_COALESCE_MINUTES)
+
+    # Add the coalesce_minutes column to recipients tables created before it existed
+    cursor.execute("PRAGMA table_info(recipients)")
+    if "coalesce_minutes" not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute(
+            "ALTER TABLE recipients ADD COLUMN coalesce_minutes INTEGER DEFAULT %d"
+            % DEFAULT_COALESCE_MINUTES
+        )
+
+    # Recreate pending_notifications tables created before class_location was
+    # part of their key. Pending openings were never sent, so the next scrape
+    # queues them again.
+    cursor.execute("PRAGMA table_info(pending_notifications)")
+    pending_columns = [column[1] for column in cursor.fetchall()]
+    if pending_columns and "class_location" not in pending_columns:
+        cursor.execute("DROP TABLE pending_notifications")
+
+    # Create the pending_notifications table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pending_notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            class_location TEXT,
+            class_date TEXT,
+            class_time TEXT,
+            class_level TEXT,
+            open_spots TEXT,
+            recipient_email TEXT,
+            queued_at TEXT,
+            UNIQUE (class_location, class_date, class_time, recipient_email)
         )
     """)
 
@@ -65,25 +107,27 @@ def get_db_connection():
 # was_notified
 #
 # Checks if a recipient has already been notified about a specific class
-# opening (by class date and time).
+# opening (by class location, date and time).
 #
 # Inputs:
 #   class_date (str): The date of the class.
 #   class_time (str): The time of the class.
 #   recipient_email (str): The recipient's email address.
+#   class_location (str): The Club Pilates location of the class.
 #
 # Outputs:
 #   bool: Returns True if the recipient has been notified about the
 #         specific class, False otherwise.
 ##################################################################################
-def was_notified(class_date, class_time, recipient_email):
+def was_notified(class_date, class_time, recipient_email, class_location):
 
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("""
         SELECT 1 FROM sent_notifications
         WHERE class_date = ? AND class_time = ? AND recipient_email = ?
-    """, (class_date, class_time, recipient_email))
+        AND (class_location = ? OR class_location IS NULL)
+    """, (class_date, class_time, recipient_email, class_location))
     result = cursor.fetchone()
     conn.close()
 
@@ -99,18 +143,20 @@ def was_notified(class_date, class_time, recipient_email):
 #   class_time (str): The time of the class.
 #   class_level (str): The difficulty level of the class.
 #   recipient_email (str): The email address of the recipient.
+#   class_location (str): The Club Pilates location of the class.
 #
 # Outputs:
 #   None
 ##################################################################################
-def save_notification(class_date, class_time, class_level, recipient_email):
+def save_notification(class_date, class_time, class_level, recipient_email, class_location):
     
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("""
-        INSERT INTO sent_notifications (class_date, class_time, class_level, recipient_email)
-        VALUES (?, ?, ?, ?)
-    """, (class_date, class_time, class_level, recipient_email))
+        INSERT INTO sent_notifications
+            (class_date, class_time, class_level, recipient_email, class_location)
+        VALUES (?, ?, ?, ?, ?)
+    """, (class_date, class_time, class_level, recipient_email, class_location))
     conn.commit()
     conn.close()
 
@@ -133,25 +179,128 @@ def process_openings(openings, recipient_email):
     new_openings = []
     
     for open_class in openings:
-        if not was_notified(open_class["date"], open_class["time"], recipient_email):
+        if not was_notified(open_class["date"], open_class["time"], recipient_email, open_class["location"]):
             new_openings.append(open_class)
 
     return new_openings
 
+##################################################################################
+# queue_openings
+#
+# Adds class openings to the recipient's pending notifications so they can be
+# sent together as a single digest email.
+#
+# Inputs:
+#   openings (list): A list of dictionaries where each dictionary represents
+#                    an open class.
+#   recipient_email (str): The email address of the recipient.
+#
+# Outputs:
+#   None
+#
+# Notes:
+#   - An opening that is already pending has its level and open spots updated,
+#     but keeps its original queued_at time so the window is not extended.
+##################################################################################
+def queue_openings(openings, recipient_email):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    queued_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for open_class in openings:
+        cursor.execute("""
+            INSERT INTO pending_notifications
+                (class_location, class_date, class_time, class_level, open_spots, recipient_email, queued_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (class_location, class_date, class_time, recipient_email)
+            DO UPDATE SET class_level = excluded.class_level, open_spots = excluded.open_spots
+        """, (
+            open_class["location"],
+            open_class["date"],
+            open_class["time"],
+            open_class["level"],
+            open_class["open_spots"],
+            recipient_email,
+            queued_at,
+        ))
+
+    conn.commit()
+    conn.close()
+
+##################################################################################
+# get_pending_openings
+#
+# Retrieves the class openings waiting to be sent to a recipient.
+#
+# Inputs:
+#   recipient_email (str): The email address of the recipient.
+#
+# Outputs:
+#   list: A list of dictionaries in the same format as the scraped openings,
+#         ordered by class date and time. Each dictionary also includes
+#         "queued_at", the time the opening was first queued.
+##################################################################################
+def get_pending_openings(recipient_email):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT open_spots, class_level, class_date, class_time, class_location, queued_at
+        FROM pending_notifications
+        WHERE recipient_email = ?
+        ORDER BY class_date, class_time, class_location
+    """, (recipient_email,))
+    rows = cursor.fetchall()
+
+    conn.close()
+    return [
+        {
+            "open_spots": row[0],
+            "level": row[1],
+            "date": row[2],
+            "time": row[3],
+            "location": row[4],
+            "queued_at": row[5],
+        }
+        for row in rows
+    ]
+
+##################################################################################
+# clear_pending_notifications
+#
+# Removes all pending notifications for a recipient, e.g. after they have
+# been sent as a digest.
+#
+# Inputs:
+#   recipient_email (str): The email address of the recipient.
+#
+# Outputs:
+#   None
+##################################################################################
+def clear_pending_notifications(recipient_email):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("DELETE FROM pending_notifications WHERE recipient_email = ?", (recipient_email,))
+
+    conn.commit()
+    conn.close()
+
 ##################################################################################
 # delete_class_entries
 #
-# Deletes all rows from the sent_notifications table that match the given 
-# class_date and class_time.
+# Deletes all rows from the sent_notifications and pending_notifications tables
+# that match the given class_location, class_date and class_time.
 #
 # Inputs:
 #   class_date (str): The date of the class to delete.
 #   class_time (str): The time of the class to delete.
+#   class_location (str): The Club Pilates location of the class to delete.
 #
 # Outputs:
 #   None
 ##################################################################################
-def delete_class_entries(class_date, class_time):
+def delete_class_entries(class_date, class_time, class_location):
 
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -159,7 +308,14 @@ def delete_class_entries(class_date, class_time):
     cursor.execute("""
         DELETE FROM sent_notifications 
         WHERE class_date = ? AND class_time = ?
-    """, (class_date, class_time))
+        AND (class_location = ? OR class_location IS NULL)
+    """, (class_date, class_time, class_location))
+
+    # A class that is no longer open should not go out in a pending digest
+    cursor.execute("""
+        DELETE FROM pending_notifications
+        WHERE class_date = ? AND class_time = ? AND class_location = ?
+    """, (class_date, class_time, class_location))
 
     conn.commit()
     conn.close()
@@ -167,8 +323,8 @@ def delete_class_entries(class_date, class_time):
 ##################################################################################
 # cleanup_old_classes
 #
-# Removes class entries from the sent_notifications table that have already 
-# started, based on the current date and time.
+# Removes class entries from the sent_notifications and pending_notifications
+# tables that have already started, based on the current date and time.
 #
 # Inputs:
 #   None
@@ -184,6 +340,9 @@ def cleanup_old_classes():
     cursor.execute("""
         DELETE FROM sent_notifications WHERE class_date || ' ' || class_time < ?
     """, (current_time,))
+    cursor.execute("""
+        DELETE FROM pending_notifications WHERE class_date || ' ' || class_time < ?
+    """, (current_time,))
 
     conn.commit()
     conn.close()    
@@ -214,7 +373,8 @@ def add_recipient(email):
 ##################################################################################
 # remove_recipient
 #
-# Removes a recipient email from the recipients table in the database.
+# Removes a recipient email from the recipients table in the database, along
+# with any notifications still pending for them.
 #
 # Inputs:
 #   email (str): The email address of the recipient to be removed.
@@ -227,6 +387,7 @@ def remove_recipient(email):
     cursor = conn.cursor()
     
     cursor.execute("DELETE FROM recipients WHERE email = ?", (email,))
+    cursor.execute("DELETE FROM pending_notifications WHERE recipient_email = ?", (email,))
     conn.commit()
     print(f"Removed {email} from the database.")
     conn.close()
@@ -274,6 +435,68 @@ def get_all_recipients():
     conn.close()
     return [email[0] for email in recipients]
 
+##################################################################################
+# get_coalesce_window
+#
+# Retrieves how long a recipient's new openings are held before being sent as
+# a single digest email.
+#
+# Inputs:
+#   email (str): The email address of the recipient.
+#
+# Outputs:
+#   int: The coalescing window in minutes. Returns DEFAULT_COALESCE_MINUTES if
+#        the recipient has no window set.
+##################################################################################
+def get_coalesce_window(email):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT coalesce_minutes FROM recipients WHERE email = ?", (email,))
+    result = cursor.fetchone()
+
+    conn.close()
+    if result is None or result[0] is None:
+        return DEFAULT_COALESCE_MINUTES
+    return result[0]
+
+##################################################################################
+# set_coalesce_window
+#
+# Sets how long a recipient's new openings are held before being sent as a
+# single digest email.
+#
+# Inputs:
+#   email (str): The email address of the recipient.
+#   minutes (int): The coalescing window in minutes. 0 sends every opening
+#                  as soon as it is found. Negative values are rejected.
+#
+# Outputs:
+#   None
+#
+# Notes:
+#   - Calls init_db() first so databases created before the coalesce_minutes
+#     column existed are migrated.
+##################################################################################
+def set_coalesce_window(email, minutes):
+    if minutes < 0:
+        print(f"Coalescing window must be 0 or more minutes, got {minutes}.")
+        return
+
+    init_db()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("UPDATE recipients SET coalesce_minutes = ? WHERE email = ?", (minutes, email))
+    conn.commit()
+    if cursor.rowcount:
+        print(f"Set coalescing window for {email} to {minutes} minute(s).")
+    else:
+        print(f"Recipient {email} is not in the database.")
+
+    conn.close()
+
 
 if __name__ == "__main__":
     init_db()
@@ -1,5 +1,5 @@
 import argparse
-from db import add_recipient, remove_recipient
+from db import add_recipient, remove_recipient, set_coalesce_window
 
 ##################################################################################
 # main
@@ -18,10 +18,13 @@ from db import add_recipient, remove_recipient
 #     python script.py add <email>
 #   - To delete a recipient:
 #     python script.py delete <email>
+#   - To set how many minutes openings are held before being emailed as one digest:
+#     python script.py window <email> <minutes>
 #
 # Example:
 #   python manage_users.py add recipient@example.com  # Adds email to the list
 #   python manage_users.py delete recipient@example.com  # Removes email from the list
+#   python manage_users.py window recipient@example.com 30  # Holds openings for 30 minutes
 ##################################################################################
 
 def main():
@@ -36,12 +39,19 @@ def main():
     delete_parser = subparsers.add_parser("delete", help="Remove a recipient from the mailing list")
     delete_parser.add_argument("email", type=str, help="Email address of the recipient")
 
+    # Set coalescing window command
+    window_parser = subparsers.add_parser("window", help="Set how long openings are held before being emailed")
+    window_parser.add_argument("email", type=str, help="Email address of the recipient")
+    window_parser.add_argument("minutes", type=int, help="Coalescing window in minutes (0 sends immediately)")
+
     args = parser.parse_args()
 
     if args.command == "add":
         add_recipient(args.email)
     elif args.command == "delete":
         remove_recipient(args.email)
+    elif args.command == "window":
+        set_coalesce_window(args.email, args.minutes)
     else:
         parser.print_help()
 
@@ -1,7 +1,51 @@
-from datetime import datetime
-from scraper.scraper import check_class_openings
+from datetime import datetime, timedelta
+from scraper.runner import run_scrapers
 from notif.email_sender import gmail_send_message
-from database.db import process_openings, get_all_recipients, cleanup_old_classes
+from database.db import (
+    init_db,
+    process_openings,
+    get_all_recipients,
+    cleanup_old_classes,
+    queue_openings,
+    get_pending_openings,
+    clear_pending_notifications,
+    get_coalesce_window,
+)
+
+# Openings for classes starting within this many hours bypass the coalescing window
+URGENT_HOURS = 3
+
+##################################################################################
+# should_flush
+#
+# Decides whether a recipient's pending openings should be sent now as a
+# single digest email.
+#
+# Inputs:
+#   pending (list): The recipient's pending openings from get_pending_openings().
+#   window_minutes (int): The recipient's coalescing window in minutes.
+#   now (datetime): The current date and time.
+#
+# Outputs:
+#   bool: Returns True if the oldest pending opening has waited for the whole
+#         window, or if any pending class starts within URGENT_HOURS. Returns
+#         False if there is nothing pending. Classes that have already started
+#         do not count as urgent.
+##################################################################################
+def should_flush(pending, window_minutes, now):
+    if not pending:
+        return False
+
+    oldest = min(datetime.strptime(open_class["queued_at"], "%Y-%m-%d %H:%M:%S") for open_class in pending)
+    if now - oldest >= timedelta(minutes=window_minutes):
+        return True
+
+    for open_class in pending:
+        class_datetime = datetime.strptime(open_class["date"] + " " + open_class["time"], "%Y-%m-%d %H:%M")
+        if timedelta(0) < class_datetime - now <= timedelta(hours=URGENT_HOURS):
+            return True
+
+    return False
 
 ##################################################################################
 # main
@@ -17,32 +61,48 @@ from database.db import process_openings, get_all_recipients, cleanup_old_classe
 #
 # Notes:
 #   - Retrieves the current timestamp and prints it for logging purposes.
-#   - Calls check_class_openings() to retrieve available classes.
+#   - Calls run_scrapers() to retrieve available classes from every location
+#     under a per-location deadline.
 #   - Fetches all recipients from the database and filters class openings
 #     for each recipient to avoid duplicate notifications.
-#   - Sends an email to recipients who have not yet been notified about the
-#     current class openings.
-#   - Calls cleanup_old_classes() to remove outdated class entries from the database.
+#   - Calls cleanup_old_classes() to remove outdated class entries from the
+#     database, so classes that have already started are never sent.
+#   - Queues new openings per recipient and sends all of a recipient's pending
+#     openings as one email once their coalescing window expires, or right
+#     away if one of the classes starts within URGENT_HOURS. Pending openings
+#     are kept and retried on the next run if the email fails.
 ##################################################################################
 def main():
     timestamp = datetime.now()
     print("Current Time:", timestamp, "\n")
 
-    openings = check_class_openings()
+    init_db()
+
+    openings = run_scrapers()
     recipients = get_all_recipients()
 
-    if openings:
-        for recipient in recipients:
+    if not openings:
+        print("No class openings at this time")
+
+    cleanup_old_classes()
+
+    # Pending openings are flushed even when nothing new was found this run
+    for recipient in recipients:
+        if openings:
             filtered_openings = process_openings(openings, recipient)
             if filtered_openings:
-                gmail_send_message(filtered_openings, recipient)
+                queue_openings(filtered_openings, recipient)
             else:
                 print(recipient + " was already notified about all current openings")
-    else:
-        print("No class openings at this time")
+
+        pending = get_pending_openings(recipient)
+        if should_flush(pending, get_coalesce_window(recipient), datetime.now()):
+            if gmail_send_message(pending, recipient):
+                clear_pending_notifications(recipient)
+        elif pending:
+            print("Holding %d opening(s) for %s" % (len(pending), recipient))
 
     print("\n")
-    cleanup_old_classes()
 
 if __name__ == "__main__":
     main()
@@ -21,7 +21,8 @@ SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
 #
 # Inputs:
 #   openings (list): A list of dictionaries where each dictionary represents
-#                    an open class with details such as time, level, and spots available.
+#                    an open class with details such as time, level, location and
+#                    spots available.
 #   recipient (str): The email address of the recipient.
 #
 # Outputs:
@@ -57,14 +58,17 @@ def gmail_send_message(openings, recipient):
         for open_class in openings:
             time_obj = datetime.strptime(open_class["time"], "%H:%M")
             time_12hr = time_obj.strftime("%I:%M %p")
-            message_string += "%s | %s | %s | %s\n" % (
+            message_string += "%s | %s | %s | %s | %s\n" % (
                 open_class["open_spots"].ljust(14),
                 open_class["level"].ljust(10),
                 open_class["date"].ljust(10),
                 time_12hr.ljust(15),
+                open_class["location"],
             )
 
-            save_notification(open_class["date"], open_class["time"], open_class["level"], recipient)
+            save_notification(
+                open_class["date"], open_class["time"], open_class["level"], recipient, open_class["location"]
+            )
 
         message.set_content(message_string)
 
@@ -0,0 +1,288 @@
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from scraper.scraper import LOCATIONS, create_driver, scrape_location, print_openings
+
+# Wall-clock seconds a single location may take before its browser is killed
+LOCATION_DEADLINE = 300
+
+# Maximum number of headless Chrome browsers running at the same time
+MAX_BROWSERS = 2
+
+# Browser processes older than this (in seconds) are left over from an earlier
+# run. Every browser started by run_scrapers() is killed at its deadline, so
+# twice the deadline is safely past anything an overlapping run still owns.
+STALE_PROCESS_AGE = 2 * LOCATION_DEADLINE
+
+# Prefix of the Chrome profile directory given to every browser run_scrapers()
+# starts. reap_stale_browsers() only kills browsers using such a profile.
+PROFILE_PREFIX = "pilates-scraper-"
+
+##################################################################################
+# get_process_tree
+#
+# Takes a snapshot of a process and all of its descendants.
+#
+# Inputs:
+#   pid (int): The process ID at the root of the tree.
+#
+# Outputs:
+#   list: psutil.Process objects for the descendants followed by the root, or
+#         an empty list if the root has already exited or cannot be inspected.
+#
+# Notes:
+#   - The snapshot can be killed with kill_processes() after the root has
+#     exited and its children have been reparented, which a later lookup by
+#     PID would miss.
+##################################################################################
+def get_process_tree(pid):
+    try:
+        parent = psutil.Process(pid)
+        return parent.children(recursive=True) + [parent]
+    except psutil.Error:
+        return []
+
+##################################################################################
+# kill_processes
+#
+# Kills every process in a list.
+#
+# Inputs:
+#   processes (list): psutil.Process objects to kill.
+#
+# Outputs:
+#   None
+#
+# Notes:
+#   - Processes that have already exited or cannot be killed are skipped, so
+#     one failure does not stop the rest from being killed. psutil checks that
+#     a PID has not been reused by another process before killing it.
+##################################################################################
+def kill_processes(processes):
+    for process in processes:
+        try:
+            process.kill()
+        except psutil.Error as e:
+            print("Could not kill process %d" % process.pid, e)
+
+    psutil.wait_procs(processes, timeout=5)
+
+##################################################################################
+# kill_process_tree
+#
+# Kills a process and all of its descendants. Used to take down chromedriver
+# together with the Chrome processes it spawned.
+#
+# Inputs:
+#   pid (int): The process ID at the root of the tree.
+#
+# Outputs:
+#   None
+#
+# Notes:
+#   - Processes that have already exited are ignored.
+#   - Children are collected before the parent is killed so that they are not
+#     orphaned and missed.
+##################################################################################
+def kill_process_tree(pid):
+    kill_processes(get_process_tree(pid))
+
+##################################################################################
+# is_scraper_browser
+#
+# Checks if a process is a Chrome or chromedriver process started by
+# run_scrapers(), i.e. one using a PROFILE_PREFIX profile directory.
+#
+# Inputs:
+#   process (psutil.Process): The process to check.
+#
+# Outputs:
+#   bool: Returns True for Chrome processes using a PROFILE_PREFIX profile and
+#         for chromedriver processes with such a Chrome as a child. Returns
+#         False otherwise, including for desktop Chrome, browsers started by
+#         check_class_openings() and other Selenium jobs.
+##################################################################################
+def is_scraper_browser(process):
+    try:
+        name = process.name().lower()
+
+        if "chromedriver" in name:
+            return any(is_scraper_browser(child) for child in process.children())
+
+        if "chrome" not in name and "chromium" not in name:
+            return False
+
+        return any(
+            arg.startswith("--user-data-dir=") and PROFILE_PREFIX in arg
+            for arg in process.cmdline()
+        )
+    except psutil.Error:
+        return False
+
+##################################################################################
+# reap_stale_browsers
+#
+# Kills chromedriver and headless Chrome processes left behind by earlier runs,
+# and removes their PROFILE_PREFIX profile directories, so that they do not pile
+# up on the VM across cron runs.
+#
+# Inputs:
+#   max_age (int): Processes and profile directories older than this many
+#                  seconds are removed.
+#
+# Outputs:
+#   int: The number of stale processes found.
+#
+# Notes:
+#   - Only processes owned by the current user and matched by
+#     is_scraper_browser() are considered.
+#   - All stale processes are collected before any are killed, so a
+#     chromedriver is still recognised by its Chrome child.
+#   - Each match is killed along with its descendants.
+#   - Profile directories are left behind when the scraper process itself dies
+#     before scrape_with_deadline() can remove them. They are judged stale by
+#     their modification time.
+##################################################################################
+def reap_stale_browsers(max_age=STALE_PROCESS_AGE):
+    now = time.time()
+    username = psutil.Process(os.getpid()).username()
+
+    stale = []
+    for process in psutil.process_iter():
+        try:
+            if process.username() != username or now - process.create_time() <= max_age:
+                continue
+        except psutil.Error:
+            continue
+
+        if is_scraper_browser(process):
+            stale.append(process)
+
+    for process in stale:
+        print("Killing stale browser process %d" % process.pid)
+        kill_processes(get_process_tree(process.pid) if process.is_running() else [])
+
+    for profile_dir in glob.glob(os.path.join(tempfile.gettempdir(), PROFILE_PREFIX + "*")):
+        try:
+            if now - os.path.getmtime(profile_dir) <= max_age:
+                continue
+        except OSError:
+            continue
+
+        print("Removing stale browser profile", profile_dir)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    return len(stale)
+
+##################################################################################
+# scrape_with_deadline
+#
+# Scrapes a single location in its own headless Chrome browser, killing the
+# browser if the scrape runs past its deadline.
+#
+# Inputs:
+#   location (str): The Club Pilates location slug.
+#   deadline (int): Wall-clock seconds the scrape may take.
+#
+# Outputs:
+#   list: The openings scraped for the location. If the scrape timed out or
+#         raised an exception, this holds the openings for the days that were
+#         scraped before it stopped.
+#
+# Notes:
+#   - A watchdog timer kills the browser process tree when the deadline
+#     expires. The next Selenium call then fails and the scrape unwinds. The
+#     watchdog keeps running until driver.quit() has returned, so a hung quit
+#     is killed too.
+#   - The browser process tree is snapshotted while chromedriver is alive and
+#     the snapshot is killed before returning, so Chrome processes orphaned by
+#     chromedriver exiting do not outlive the scrape.
+#   - The browser uses a temporary PROFILE_PREFIX profile directory, which
+#     marks it for reap_stale_browsers() and is removed afterwards.
+##################################################################################
+def scrape_with_deadline(location, deadline=LOCATION_DEADLINE):
+    openings = []
+    timed_out = threading.Event()
+    profile_dir = tempfile.mkdtemp(prefix=PROFILE_PREFIX)
+
+    try:
+        driver = create_driver(profile_dir)
+    except Exception as e:
+        print("Could not start browser for", location, e)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        return openings
+
+    pid = driver.service.process.pid
+    processes = get_process_tree(pid)
+
+    def on_deadline():
+        timed_out.set()
+        kill_process_tree(pid)
+        kill_processes(list(processes))
+
+    watchdog = threading.Timer(deadline, on_deadline)
+    watchdog.daemon = True
+    watchdog.start()
+
+    try:
+        scrape_location(driver, location, openings)
+    except Exception as e:
+        if timed_out.is_set():
+            print("Scraping %s exceeded the %d second deadline" % (location, deadline))
+        else:
+            print("Scraping %s failed" % location, e)
+        print("Returning %d opening(s) scraped before the failure" % len(openings))
+    finally:
+        # Pick up Chrome processes started during the scrape, e.g. renderers
+        processes.extend(get_process_tree(pid))
+
+        # The browser is already gone after a timeout, so only quit cleanly otherwise
+        if not timed_out.is_set():
+            try:
+                driver.quit()
+            except Exception as e:
+                print("Could not quit browser for", location, e)
+
+        watchdog.cancel()
+        kill_processes(processes)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    return openings
+
+##################################################################################
+# run_scrapers
+#
+# Scrapes every location under supervision and returns the combined openings.
+#
+# Inputs:
+#   locations (list): The Club Pilates location slugs to scrape.
+#   deadline (int): Wall-clock seconds each location may take.
+#   max_browsers (int): Maximum number of browsers running at the same time.
+#
+# Outputs:
+#   list: A list of dictionaries containing details about available classes,
+#         in the same format as check_class_openings().
+#
+# Notes:
+#   - Calls reap_stale_browsers() first to clean up after earlier runs.
+#   - A location that times out or fails contributes its partial results
+#     without affecting the other locations.
+##################################################################################
+def run_scrapers(locations=LOCATIONS, deadline=LOCATION_DEADLINE, max_browsers=MAX_BROWSERS):
+    reap_stale_browsers()
+
+    with ThreadPoolExecutor(max_workers=max_browsers) as executor:
+        results = list(executor.map(lambda location: scrape_with_deadline(location, deadline), locations))
+
+    openings = [open_class for result in results for open_class in result]
+
+    print_openings(openings)
+
+    return openings
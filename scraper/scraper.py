@@ -9,6 +9,9 @@ from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 
+# Replace location with desired Club Pilates location(s)
+LOCATIONS = ["<location>"]
+
 ##################################################################################
 # close_cookie_popup
 #
@@ -33,40 +36,60 @@ def close_cookie_popup(driver):
         print("No cookie popup found or could not click it", e)
 
 ##################################################################################
-# check_class_openings
+# create_driver
 #
-# Scrapes the Club Pilates website for available class openings over a two-week 
-# period and returns a list of available Flow 1 or 1.5 classes.
+# Launches a headless Chrome browser controlled by Selenium.
 #
 # Inputs:
-#   None
+#   user_data_dir (str): Optional Chrome profile directory. run_scrapers() uses
+#                        this to mark the browsers it owns.
 #
 # Outputs:
-#   list: A list of dictionaries containing details about available classes.
-#         Each dictionary includes:
-#         - "open_spots": Number of open spots in the class
-#         - "level": Class level (Flow 1 or Flow 1.5)
-#         - "date": Date of the class
-#         - "time": Start time of the class in 24-hour format
+#   WebDriver: Selenium WebDriver configured to control headless Chrome.
+##################################################################################
+def create_driver(user_data_dir=None):
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Run in headless mode
+
+    if user_data_dir is not None:
+        chrome_options.add_argument("--user-data-dir=" + user_data_dir)
+
+    return webdriver.Chrome(options=chrome_options)
+
+##################################################################################
+# scrape_location
+#
+# Scrapes one Club Pilates location for available class openings over a two-week
+# period, appending each opening to the supplied list as soon as its day has
+# been scraped.
+#
+# Inputs:
+#   driver (WebDriver): Selenium WebDriver configured to control Chrome.
+#   location (str): The Club Pilates location slug used in the location URL.
+#   openings (list): The list that scraped openings are appended to. Because it
+#                    is filled in day by day, it holds partial results for the
+#                    days that were scraped if the scrape is interrupted.
+#
+# Outputs:
+#   None
 #
 # Notes:
-#   - Uses Selenium to navigate the Club Pilates scheduling page.
-#   - Scrapes class details using BeautifulSoup.
+#   - Each opening dictionary includes:
+#     - "open_spots": Number of open spots in the class
+#     - "level": Class level (Flow 1 or Flow 1.5)
+#     - "date": Date of the class
+#     - "time": Start time of the class in 24-hour format
+#     - "location": The location slug the class was scraped from
 #   - Filters out full or waitlisted classes.
-#   - Converts class times to 24-hour format for database storage.
+#   - Converts class times to 24-hour format for database storage. Rows whose
+#     start time cannot be read are skipped.
 #   - Calls delete_class_entries() to remove outdated class records from the database.
 #   - Filters out classes that have already started.
+#   - Exceptions (e.g. a WebDriverWait timeout) are raised to the caller; the
+#     caller owns the driver and is responsible for quitting it.
 ##################################################################################
-def check_class_openings():
-    openings = []
-
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
-
-    driver = webdriver.Chrome(options=chrome_options)
-
-    # Replace location with desired Club Pilates location
-    driver.get("https://www.clubpilates.com/location/<location>")
+def scrape_location(driver, location, openings):
+    driver.get("https://www.clubpilates.com/location/" + location)
 
     # Wait for page to load and cookie popup to appear
     time.sleep(3)
@@ -120,13 +143,21 @@ def check_class_openings():
 
             for index in range(len(class_status)):
 
+                # Convert time to 24hr format, as stored in the db
+                time_str = row_meta[index].text[:7].replace("-", "")
+                try:
+                    converted_time = datetime.strptime(time_str, "%I:%M%p").strftime("%H:%M")
+                except ValueError:
+                    print("Could not read class start time", row_meta[index].text)
+                    continue
+
                 # Skip if class is full, on waitlist, or has no text
                 if (
                     "Waitlist" in class_status[index].text
                     or not class_status[index].text.strip()
                     or "full" in class_status[index].text
                 ):
-                    delete_class_entries(button_date[i].get("value"), row_meta[index].text)
+                    delete_class_entries(button_date[i].get("value"), converted_time, location)
                 else:
                     start_index = class_type[index].text.find("Flow")
                     substring = class_type[index].text[start_index : start_index + 8]
@@ -134,10 +165,6 @@ def check_class_openings():
 
                     # We only want Flow 1 or 1.5 openings
                     if "1" in substring:
-                        # Convert time to 24hr format to store in db
-                        time_str = row_meta[index].text[:7].replace("-", "")
-                        converted_time = datetime.strptime(time_str, "%I:%M%p").strftime("%H:%M")
-
                         # Get current date and time for filtering
                         class_datetime = datetime.strptime(
                             button_date[i].get("value") + " " + converted_time, "%Y-%m-%d %H:%M"
@@ -152,23 +179,70 @@ def check_class_openings():
                                     "level": substring,
                                     "date": button_date[i].get("value"),
                                     "time": converted_time,
+                                    "location": location,
                                 }
                             )
 
-    driver.quit()
-
-    # Print class openings for debugging/logging
+##################################################################################
+# print_openings
+#
+# Prints class openings in a fixed-width table for debugging/logging.
+#
+# Inputs:
+#   openings (list): A list of dictionaries where each dictionary represents
+#                    an open class.
+#
+# Outputs:
+#   None
+##################################################################################
+def print_openings(openings):
     for open_class in openings:
         time_obj = datetime.strptime(open_class["time"], "%H:%M")
         time_12hr = time_obj.strftime("%I:%M %p")
         print(
-            "%s | %s | %s | %s"
+            "%s | %s | %s | %s | %s"
             % (
                 open_class["open_spots"].ljust(12),
                 open_class["level"].ljust(8),
                 open_class["date"].ljust(10),
                 time_12hr.ljust(15),
+                open_class["location"],
             )
         )
 
+##################################################################################
+# check_class_openings
+#
+# Scrapes the Club Pilates website for available class openings over a two-week 
+# period and returns a list of available Flow 1 or 1.5 classes.
+#
+# Inputs:
+#   location (str): The Club Pilates location slug. Defaults to the first
+#                   entry in LOCATIONS.
+#
+# Outputs:
+#   list: A list of dictionaries containing details about available classes.
+#         See scrape_location() for the dictionary keys.
+#
+# Notes:
+#   - Uses Selenium to navigate the Club Pilates scheduling page.
+#   - The browser is always quit, even if scraping raises an exception.
+#   - For a deadline, a browser cap and cleanup of hung Chrome processes, use
+#     run_scrapers() in scraper/runner.py instead.
+##################################################################################
+def check_class_openings(location=None):
+    openings = []
+
+    if location is None:
+        location = LOCATIONS[0]
+
+    driver = create_driver()
+
+    try:
+        scrape_location(driver, location, openings)
+    finally:
+        driver.quit()
+
+    print_openings(openings)
+
     return openings
@@ -0,0 +1,104 @@
+import pytest
+
+from database import db
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db.init_db()
+
+
+def test_queue_openings_keeps_original_queued_at(temp_db):
+    opening = {"open_spots": "2 open", "level": "Flow 1", "date": "2030-01-02", "time": "09:00", "location": "a"}
+    db.queue_openings([opening], "a@example.com")
+
+    conn = db.get_db_connection()
+    conn.execute("UPDATE pending_notifications SET queued_at = '2030-01-01 07:00:00'")
+    conn.commit()
+    conn.close()
+
+    db.queue_openings([dict(opening, open_spots="1 open")], "a@example.com")
+    pending = db.get_pending_openings("a@example.com")
+
+    assert len(pending) == 1
+    assert pending[0]["open_spots"] == "1 open"
+    assert pending[0]["queued_at"] == "2030-01-01 07:00:00"
+
+
+def test_delete_class_entries_removes_pending(temp_db):
+    opening = {"open_spots": "2 open", "level": "Flow 1", "date": "2030-01-02", "time": "09:00", "location": "a"}
+    db.queue_openings([opening], "a@example.com")
+
+    db.delete_class_entries("2030-01-02", "09:00", "a")
+
+    assert db.get_pending_openings("a@example.com") == []
+
+
+def test_delete_class_entries_keeps_other_locations(temp_db):
+    opening = {"open_spots": "2 open", "level": "Flow 1", "date": "2030-01-02", "time": "09:00", "location": "a"}
+    other = dict(opening, location="b")
+    db.queue_openings([opening, other], "a@example.com")
+    db.save_notification("2030-01-02", "09:00", "Flow 1", "a@example.com", "b")
+
+    db.delete_class_entries("2030-01-02", "09:00", "a")
+
+    assert [open_class["location"] for open_class in db.get_pending_openings("a@example.com")] == ["b"]
+    assert db.process_openings([opening, other], "a@example.com") == [opening]
+
+
+def test_init_db_migrates_tables_without_location(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = db.get_db_connection()
+    conn.execute("""
+        CREATE TABLE sent_notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, class_date TEXT, class_time TEXT,
+            class_level TEXT, recipient_email TEXT, sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        INSERT INTO sent_notifications (class_date, class_time, class_level, recipient_email)
+        VALUES ('2030-01-02', '09:00', 'Flow 1', 'a@example.com')
+    """)
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+
+    # Notifications sent before locations were recorded are not sent again
+    assert db.was_notified("2030-01-02", "09:00", "a@example.com", "a")
+
+
+def test_init_db_adds_coalesce_column(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = db.get_db_connection()
+    conn.execute("CREATE TABLE recipients (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT UNIQUE)")
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+    db.init_db()
+    db.add_recipient("a@example.com")
+
+    assert db.get_coalesce_window("a@example.com") == db.DEFAULT_COALESCE_MINUTES
+
+
+def test_set_coalesce_window_migrates_old_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = db.get_db_connection()
+    conn.execute("CREATE TABLE recipients (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT UNIQUE)")
+    conn.execute("INSERT INTO recipients (email) VALUES ('a@example.com')")
+    conn.commit()
+    conn.close()
+
+    db.set_coalesce_window("a@example.com", 30)
+
+    assert db.get_coalesce_window("a@example.com") == 30
+
+
+def test_set_coalesce_window_rejects_negative(temp_db):
+    db.add_recipient("a@example.com")
+
+    db.set_coalesce_window("a@example.com", -5)
+
+    assert db.get_coalesce_window("a@example.com") == db.DEFAULT_COALESCE_MINUTES
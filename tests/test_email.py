@@ -0,0 +1,26 @@
+import base64
+from email import message_from_bytes
+from unittest import mock
+
+from notif import email_sender
+
+OPENING = {"open_spots": "2 open", "level": "Flow 1", "date": "2030-01-02", "time": "09:00", "location": "a"}
+
+
+@mock.patch.object(email_sender, "save_notification")
+@mock.patch.object(email_sender, "build")
+@mock.patch.object(email_sender.Credentials, "from_authorized_user_file")
+@mock.patch.object(email_sender.os.path, "exists", return_value=True)
+def test_gmail_send_message_lists_openings_and_saves_them(exists, from_file, build, save_notification):
+    from_file.return_value.valid = True
+    send = build.return_value.users.return_value.messages.return_value.send
+    send.return_value.execute.return_value = {"id": "1"}
+
+    result = email_sender.gmail_send_message([OPENING], "r@example.com")
+
+    raw = send.call_args.kwargs["body"]["raw"]
+    message = message_from_bytes(base64.urlsafe_b64decode(raw))
+    assert result == {"id": "1"}
+    assert message["To"] == "r@example.com"
+    assert "09:00 AM" in message.get_payload() and "| a" in message.get_payload()
+    save_notification.assert_called_once_with("2030-01-02", "09:00", "Flow 1", "r@example.com", "a")
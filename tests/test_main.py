@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from unittest import mock
+
+import main
+from main import should_flush
+
+NOW = datetime(2030, 1, 1, 8, 0)
+
+
+def make_pending(date="2030-01-02", time="09:00", queued_at="2030-01-01 07:55:00"):
+    return {
+        "open_spots": "2 open",
+        "level": "Flow 1",
+        "date": date,
+        "time": time,
+        "location": "a",
+        "queued_at": queued_at,
+    }
+
+
+def test_should_flush_nothing_pending():
+    assert not should_flush([], 15, NOW)
+
+
+def test_should_flush_holds_until_window_expires():
+    assert not should_flush([make_pending(queued_at="2030-01-01 07:50:00")], 15, NOW)
+
+
+def test_should_flush_when_window_expired():
+    assert should_flush([make_pending(queued_at="2030-01-01 07:45:00")], 15, NOW)
+
+
+def test_should_flush_urgent_class():
+    assert should_flush([make_pending(date="2030-01-01", time="10:00")], 15, NOW)
+
+
+def test_should_flush_ignores_class_already_started():
+    assert not should_flush([make_pending(date="2030-01-01", time="07:30")], 15, NOW)
+
+
+
+
+def run_main(send_result):
+    pending = [make_pending(queued_at="2000-01-01 00:00:00")]
+    send = mock.Mock(return_value=send_result)
+    with mock.patch.multiple(
+        main,
+        init_db=mock.DEFAULT,
+        run_scrapers=mock.Mock(return_value=[]),
+        get_all_recipients=mock.Mock(return_value=["a@example.com"]),
+        cleanup_old_classes=mock.DEFAULT,
+        get_pending_openings=mock.Mock(return_value=pending),
+        get_coalesce_window=mock.Mock(return_value=15),
+        gmail_send_message=send,
+        clear_pending_notifications=mock.DEFAULT,
+    ) as mocks:
+        main.main()
+
+    send.assert_called_once_with(pending, "a@example.com")
+    return mocks["clear_pending_notifications"]
+
+
+def test_main_clears_pending_after_successful_send():
+    clear_pending_notifications = run_main({"id": "1"})
+
+    clear_pending_notifications.assert_called_once_with("a@example.com")
+
+
+def test_main_keeps_pending_when_send_fails():
+    clear_pending_notifications = run_main(None)
+
+    clear_pending_notifications.assert_not_called()
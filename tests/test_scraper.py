@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from unittest import mock
+
+import psutil
+from selenium.common.exceptions import WebDriverException
+
+from scraper import runner
+
+OPENING = {"open_spots": "2 open", "level": "Flow 1", "date": "2030-01-01", "time": "09:00", "location": "a"}
+
+
+def make_process(name, cmdline=(), children=()):
+    process = mock.Mock()
+    process.name.return_value = name
+    process.cmdline.return_value = list(cmdline)
+    process.children.return_value = list(children)
+    return process
+
+
+def make_driver(pid=1234):
+    driver = mock.Mock()
+    driver.service.process.pid = pid
+    return driver
+
+
+@mock.patch.object(runner, "kill_processes")
+@mock.patch.object(runner, "kill_process_tree")
+@mock.patch.object(runner, "get_process_tree")
+@mock.patch.object(runner, "create_driver")
+def test_scrape_with_deadline_returns_partial_results_on_error(
+    create_driver, get_process_tree, kill_process_tree, kill_processes
+):
+    driver = make_driver()
+    create_driver.return_value = driver
+    browser = mock.Mock()
+    get_process_tree.return_value = [browser]
+
+    def scrape_location(driver, location, openings):
+        openings.append(OPENING)
+        raise WebDriverException("page changed")
+
+    with mock.patch.object(runner, "scrape_location", side_effect=scrape_location):
+        openings = runner.scrape_with_deadline("somewhere", deadline=30)
+
+    assert openings == [OPENING]
+    driver.quit.assert_called_once()
+    kill_process_tree.assert_not_called()
+    assert browser in kill_processes.call_args[0][0]
+
+
+@mock.patch.object(runner, "kill_processes")
+@mock.patch.object(runner, "kill_process_tree")
+@mock.patch.object(runner, "get_process_tree", return_value=[])
+@mock.patch.object(runner, "create_driver")
+def test_scrape_with_deadline_kills_hung_browser(
+    create_driver, get_process_tree, kill_process_tree, kill_processes
+):
+    driver = make_driver(pid=4321)
+    create_driver.return_value = driver
+    killed = threading.Event()
+    kill_process_tree.side_effect = lambda pid: killed.set()
+
+    def scrape_location(driver, location, openings):
+        openings.append(OPENING)
+        # Stands in for a Selenium call that only fails once the browser is killed
+        if not killed.wait(5):
+            raise AssertionError("watchdog did not fire")
+        raise WebDriverException("browser killed")
+
+    with mock.patch.object(runner, "scrape_location", side_effect=scrape_location):
+        openings = runner.scrape_with_deadline("somewhere", deadline=0.1)
+
+    assert openings == [OPENING]
+    kill_process_tree.assert_called_once_with(4321)
+    driver.quit.assert_not_called()
+
+
+@mock.patch.object(runner, "create_driver", side_effect=WebDriverException("no chrome"))
+def test_scrape_with_deadline_handles_browser_start_failure(create_driver):
+    assert runner.scrape_with_deadline("somewhere", deadline=30) == []
+
+
+def test_is_scraper_browser_matches_runner_chrome():
+    chrome = make_process(
+        "chrome", ["chrome", "--headless", "--user-data-dir=/tmp/" + runner.PROFILE_PREFIX + "abc"]
+    )
+
+    assert runner.is_scraper_browser(chrome)
+
+
+def test_is_scraper_browser_matches_chromedriver_of_runner_chrome():
+    chrome = make_process(
+        "chrome", ["chrome", "--headless", "--user-data-dir=/tmp/" + runner.PROFILE_PREFIX + "abc"]
+    )
+    chromedriver = make_process("chromedriver", ["chromedriver", "--port=9515"], [chrome])
+
+    assert runner.is_scraper_browser(chromedriver)
+
+
+def test_is_scraper_browser_ignores_desktop_chrome():
+    chrome = make_process("chrome", ["/opt/google/chrome/chrome"])
+
+    assert not runner.is_scraper_browser(chrome)
+
+
+def test_is_scraper_browser_ignores_other_headless_chrome():
+    chrome = make_process("chrome", ["chrome", "--headless"])
+    chromedriver = make_process("chromedriver", ["chromedriver", "--port=9515"], [chrome])
+
+    assert not runner.is_scraper_browser(chrome)
+    assert not runner.is_scraper_browser(chromedriver)
+
+
+def test_kill_processes_continues_after_access_denied():
+    denied = mock.Mock(pid=1)
+    denied.kill.side_effect = psutil.AccessDenied(1)
+    other = mock.Mock(pid=2)
+
+    with mock.patch.object(runner.psutil, "wait_procs"):
+        runner.kill_processes([denied, other])
+
+    other.kill.assert_called_once()
+
+
+@mock.patch.object(runner.psutil, "process_iter", return_value=[])
+def test_reap_stale_browsers_removes_old_profiles(process_iter, tmp_path):
+    stale = tmp_path / (runner.PROFILE_PREFIX + "old")
+    fresh = tmp_path / (runner.PROFILE_PREFIX + "new")
+    stale.mkdir()
+    fresh.mkdir()
+    old = time.time() - 2 * runner.STALE_PROCESS_AGE
+    os.utime(stale, (old, old))
+
+    with mock.patch.object(runner.tempfile, "gettempdir", return_value=str(tmp_path)):
+        runner.reap_stale_browsers()
+
+    assert not stale.exists()
+    assert fresh.exists()